@@ -1,65 +1,242 @@
+import os
 import re
+import time
 import uuid
+import hashlib
+import threading
+import multiprocessing
 from io import BytesIO
-from datetime import datetime
-
-from flask import Flask, request, render_template_string, send_file
+from datetime import date, datetime
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import Flask, Response, render_template, request, send_file, stream_template
 import fitz  # PyMuPDF
 
 # Optional background cleanup (works even if Pillow is NOT installed)
 try:
-    from PIL import Image
+    from PIL import Image, ImageChops
 except Exception:
-    Image = None
+    Image = ImageChops = None
+
+# Optional PDFium text backend, selected with PDF_BACKEND=pdfium (PyMuPDF stays the default)
+try:
+    import pypdfium2 as pdfium
+except Exception:
+    pdfium = None
+
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "pymupdf").strip().lower()
 
 app = Flask(__name__, static_folder="static", static_url_path="/static")
 
 # -----------------------------
 # Regex
 # -----------------------------
+# Money is captured with flat character classes; sign, parentheses and separators are sorted out
+# by signed_money_to_cents. Whitespace in the prefix is only allowed after a sign character, so it
+# never overlaps the \s* that precedes MONEY (unbounded blank runs would backtrack quadratically).
+MONEY = r"(?:[(\-$]\s*)*[0-9][0-9,.]*\s*\)?"
+
+# Case-insensitivity is scoped to the words themselves, so digits and separators are compared as-is
 BALANCE_DUE_REGEX = re.compile(
-    r"\bBalance\s+due\b\s*:\s*"
-    r"(?P<paren_open>\()?\s*"
-    r"(?P<sign>-)?\s*"
-    r"\$?\s*"
-    r"(?P<amount>[0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?)\s*"
-    r"(?P<paren_close>\))?",
-    re.IGNORECASE
+    rf"\b(?i:Balance\s+due)\b\s*:\s*(?P<amount>{MONEY})"
 )
 
 SUBTOTAL_EMPTY_LOADED_REGEX = re.compile(
-    r"\bSubtotal\s*:\s*([0-9]{1,6})\s+([0-9]{1,6})\b",
-    re.IGNORECASE
+    r"\b(?i:Subtotal)\s*:\s*(?P<empty>[0-9]{1,6})\s+(?P<loaded>[0-9]{1,6})\b"
 )
 
 LOAD_ROW_PICKUP_DELIVERY_REGEX = re.compile(
     r"\b\d{4,6}\s+(?P<pickup>\d{2}/\d{2}/\d{2})\s+(?P<delivery>\d{2}/\d{2}/\d{2})\b"
 )
 
+# Subtotal lines under the Tolls / Deductions headings. No ".*?" bridge from the heading:
+# COMBINED_REGEX finds the heading and these are searched from its end (see subtotal_after).
 TOLLS_SUBTOTAL_REGEX = re.compile(
-    r"\bTolls\b.*?\bSubtotal\b\s*(\(?-?\$?\s*[0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?\)?)",
-    re.IGNORECASE
+    rf"\b(?i:Subtotal)\b\s*({MONEY})"
 )
 
 # NEW: Deductions subtotal (Truck expenses)
 DEDUCTIONS_SUBTOTAL_REGEX = re.compile(
-    r"\bDeductions\b.*?\bSubtotal\b\s*:\s*(\(?-?\$?\s*[0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?\)?)",
-    re.IGNORECASE
+    rf"\b(?i:Subtotal)\b\s*:\s*({MONEY})"
+)
+
+# All fields in one pass over the text; dispatch on m.lastgroup.
+# The lookahead keeps hits zero-width, so fields sharing text still match like separate searches.
+# Every field starts at a word boundary with B/S/T/D or a digit; checking that first skips most positions.
+# Tolls/Deductions only match their heading here, the subtotal is searched from that point on.
+COMBINED_REGEX = re.compile(
+    r"\b(?=[BbSsTtDd\d])(?="
+    rf"(?P<balance>{BALANCE_DUE_REGEX.pattern})"
+    rf"|(?P<miles>{SUBTOTAL_EMPTY_LOADED_REGEX.pattern})"
+    r"|(?P<tolls>\b(?i:Tolls)\b)"
+    r"|(?P<expenses>\b(?i:Deductions)\b)"
+    rf"|(?P<loadrow>{LOAD_ROW_PICKUP_DELIVERY_REGEX.pattern})"
+    r")"
 )
 
+# Plain text without layout sorting, mediabox clipping or CID fallback (~10% cheaper per page)
+TEXT_FLAGS = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE
+
+class UploadStore:
+    """
+    In-memory upload_id -> files map that evicts least recently used uploads once there are more than
+    max_entries of them or the stored PDF bytes exceed max_bytes (the newest upload is always kept),
+    and drops uploads nobody has touched for ttl_seconds. An upload's size is re-counted whenever it
+    is read back, since files drop their bytes once their fields are cached.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # upload_id -> (files, size, last_used), oldest first
+        self._total_bytes = 0
+        self._lock = threading.RLock()  # gunicorn gthread serves requests concurrently
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            upload_id, (_, _, last_used) = next(iter(self._entries.items()))
+            over_budget = len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            )
+            if last_used >= cutoff and not over_budget:
+                break
+            del self[upload_id]
+
+    def get(self, upload_id, default=None):
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(upload_id)
+            if entry is None:
+                return default
+            files, old_size, _ = entry
+            size = self._size(files)
+            self._entries[upload_id] = (files, size, time.monotonic())
+            self._entries.move_to_end(upload_id)
+            self._total_bytes += size - old_size
+            return files
+
+    def __setitem__(self, upload_id, files):
+        size = self._size(files)
+        with self._lock:
+            if upload_id in self._entries:
+                del self[upload_id]
+            self._entries[upload_id] = (files, size, time.monotonic())
+            self._total_bytes += size
+            self._expire()
+
+    def __delitem__(self, upload_id):
+        with self._lock:
+            _, size, _ = self._entries.pop(upload_id)
+            self._total_bytes -= size
+
+    def pop(self, upload_id, default=None):
+        # One lock hold: a separate "in" check could see an entry another thread expires before the del
+        with self._lock:
+            entry = self._entries.pop(upload_id, None)
+            if entry is None:
+                return default
+            files, size, _ = entry
+            self._total_bytes -= size
+            return files
+
+    @staticmethod
+    def _size(files) -> int:
+        return sum(len(item["bytes"]) for item in files if item["bytes"] is not None)
+
+
+class FieldsCache:
+    """
+    Bounded LRU of extracted fields keyed by a digest of the PDF bytes, so the same statement
+    uploaded again (new upload, after "remove", another tab) is never parsed twice.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # digest -> fields, oldest first
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(pdf_bytes: bytes) -> bytes:
+        return hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+
+    def get(self, digest):
+        with self._lock:
+            fields = self._entries.get(digest)
+            if fields is not None:
+                self._entries.move_to_end(digest)
+            return fields
+
+    def put(self, digest, fields):
+        with self._lock:
+            self._entries[digest] = fields
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
 # Store uploaded PDFs in memory so files persist when switching buttons
-UPLOAD_STORE = {}  # upload_id -> list[{"name": str, "bytes": bytes}]
+# Each item also caches its extracted fields, so switching buttons skips PyMuPDF;
+# the PDF bytes are dropped once the fields are in, as nothing reads the PDF again
+# upload_id -> list[{"name": str, "bytes": bytes|None, "digest": bytes, "fields": dict|None}]
+UPLOAD_STORE = UploadStore(
+    max_entries=int(os.environ.get("UPLOAD_STORE_MAX_UPLOADS", "64")),
+    max_bytes=int(os.environ.get("UPLOAD_STORE_MAX_MB", "256")) * 1024 * 1024,
+    ttl_seconds=60 * 60,
+)
+
+# Fields outlive the uploads they came from; a few hundred small dicts
+FIELDS_CACHE = FieldsCache(max_entries=512)
+
+# PDF parsing is CPU-bound and independent per file, so fan it out to worker processes.
+# forkserver, not fork: the pool starts inside gunicorn's threaded worker, and forking a
+# multi-threaded process can deadlock. Its workers import this module fresh (see the logo guard).
+# Each worker is a full copy of the app (~75 MB RSS), so the size comes from EXTRACT_WORKERS
+# rather than the host's cpu_count, which says nothing about the plan's CPU or memory quota.
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", "2"))
+
+def new_extract_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=EXTRACT_WORKERS,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+
+EXTRACT_POOL = new_extract_pool()
+_EXTRACT_POOL_LOCK = threading.Lock()
+
+def submit_extraction(pdf_bytes: bytes):
+    """
+    Submit one PDF to EXTRACT_POOL. A pool that lost a worker (OOM kill, crash) is broken for
+    good, so it is replaced once, under the lock, and the PDF goes to the fresh pool.
+    """
+    global EXTRACT_POOL
+    pool = EXTRACT_POOL
+    try:
+        return pool.submit(_extract_all, pdf_bytes)
+    except BrokenProcessPool:
+        with _EXTRACT_POOL_LOCK:
+            if EXTRACT_POOL is pool:  # another request thread may have replaced it already
+                EXTRACT_POOL = new_extract_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+            pool = EXTRACT_POOL
+        return pool.submit(_extract_all, pdf_bytes)
 
 # -----------------------------
 # Logo: render static/truck.pdf -> PNG image (non-interactive)
 # -----------------------------
 LOGO_PNG_BYTES = None
+LOGO_ETAG = None
 
 def build_logo_png_bytes():
     """
     Render static/truck.pdf (page 1) to a PNG. Best-effort remove neutral-gray background.
     """
-    global LOGO_PNG_BYTES
+    global LOGO_PNG_BYTES, LOGO_ETAG
     if LOGO_PNG_BYTES is not None:
         return
 
@@ -74,15 +251,17 @@ def build_logo_png_bytes():
         # Optional: try to remove neutral gray background
         if Image is not None:
             img = Image.open(BytesIO(raw_png)).convert("RGBA")
-            px = img.getdata()
-            new_px = []
-            for r, g, b, a in px:
-                # Detect neutral gray-ish pixels and make transparent (tuned for typical PDF logo gray boxes)
-                if a > 0 and abs(r - g) < 12 and abs(g - b) < 12 and 90 < r < 235:
-                    new_px.append((r, g, b, 0))
-                else:
-                    new_px.append((r, g, b, a))
-            img.putdata(new_px)
+            r, g, b, a = img.split()
+            # Detect neutral gray-ish pixels and make transparent (tuned for typical PDF logo gray boxes).
+            # Each test is a 0/255 band mask built with Pillow's C band ops instead of a per-pixel loop.
+            gray = ImageChops.multiply(
+                ImageChops.difference(r, g).point(lambda v: 255 if v < 12 else 0),
+                ImageChops.difference(g, b).point(lambda v: 255 if v < 12 else 0),
+            )
+            gray = ImageChops.multiply(gray, r.point(lambda v: 255 if 90 < v < 235 else 0))
+            gray = ImageChops.multiply(gray, a.point(lambda v: 255 if v > 0 else 0))
+            a.paste(0, mask=gray)
+            img.putalpha(a)
 
             out = BytesIO()
             img.save(out, format="PNG")
@@ -93,686 +272,205 @@ def build_logo_png_bytes():
     except Exception:
         LOGO_PNG_BYTES = None
 
+    if LOGO_PNG_BYTES:
+        LOGO_ETAG = hashlib.md5(LOGO_PNG_BYTES).hexdigest()
+
+
+# Render once at startup so no visitor pays for it; pool worker processes never serve the logo
+if multiprocessing.parent_process() is None:
+    build_logo_png_bytes()
 
 @app.route("/logo.png")
 def logo_png():
-    build_logo_png_bytes()
     if not LOGO_PNG_BYTES:
         return ("", 404)
-    return send_file(BytesIO(LOGO_PNG_BYTES), mimetype="image/png")
-
-
-HTML = """
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>TruckTotals</title>
-  <style>
-    body { font-family: system-ui, Arial; max-width: 980px; margin: 40px auto; padding: 0 16px; }
-    .card { border: 1px solid #ddd; border-radius: 14px; padding: 18px; margin-top: 18px; background:#fff; }
-    .muted { color: #666; }
-    button { padding: 10px 16px; border-radius: 10px; border: 1px solid #222; background:#111; color:#fff; cursor:pointer; }
-    button:disabled { opacity: .6; cursor:not-allowed; }
-    input { margin-top: 10px; }
-    table { width:100%; border-collapse: collapse; margin-top: 12px; }
-    td, th { border-bottom: 1px solid #eee; text-align:left; padding: 10px 6px; }
-    .bad { color: #b00020; }
-    .good { color: #0a7a3b; }
-    .btnrow { display:flex; gap: 10px; flex-wrap: wrap; }
-    .tablewrap { overflow-x:auto; -webkit-overflow-scrolling: touch; }
-
-    .toprow { display:flex; justify-content: space-between; align-items: center; gap: 10px; flex-wrap: wrap; }
-    .danger { background:#b00020; border-color:#b00020; }
-
-    /* Brand header (logo + title) */
-    .brand{
-      display:flex;
-      align-items:center;
-      gap:14px;
-      margin: 0 0 18px;
-      flex-wrap: wrap;
-    }
-    .brandLogo{
-      height:56px;
-      width:auto;
-      display:block;
-
-      /* make it NOT interactive */
-      pointer-events:none;
-      user-select:none;
-      -webkit-user-drag:none;
-    }
-    .brandTitle{
-      margin:0;
-      font-size: 34px;
-      line-height: 1.05;
-    }
-    .brandTagline{
-      margin: 6px 0 0;
-    }
-
-    /* Right panel (calendar drawer) */
-    .drawer {
-      position: fixed;
-      top: 0;
-      right: 0;
-      height: 100vh;
-      width: 360px;
-      max-width: 90vw;
-      background: #fff;
-      border-left: 1px solid #ddd;
-      box-shadow: -12px 0 28px rgba(0,0,0,.08);
-      transform: translateX(110%);
-      transition: transform .22s ease;
-      z-index: 50;
-      display:flex;
-      flex-direction: column;
-    }
-    .drawer.open { transform: translateX(0); }
-
-    .drawerHeader {
-      padding: 16px;
-      border-bottom: 1px solid #eee;
-      display:flex;
-      justify-content: space-between;
-      align-items:center;
-      gap: 10px;
-    }
-    .drawerHeader b { font-size: 16px; }
-    .drawerBody { padding: 16px; overflow:auto; }
-    .drawerFooter { padding: 16px; border-top: 1px solid #eee; }
-
-    .pill {
-      border: 1px solid #ddd;
-      border-radius: 12px;
-      padding: 12px;
-      background: #fafafa;
-      margin-top: 10px;
-    }
-
-    .row { display:flex; gap: 10px; align-items:center; flex-wrap: wrap; }
-    .select, .textin {
-      border: 1px solid #ddd;
-      border-radius: 12px;
-      padding: 10px 12px;
-      font-size: 14px;
-      width: 100%;
-      box-sizing: border-box;
-    }
-    .mini { width: 100px; }
-    .month { flex: 1; min-width: 160px; }
-
-    .ghostBtn {
-      background:#fff;
-      color:#111;
-      border:1px solid #222;
-    }
-
-    .hint { font-size: 13px; color: #666; margin-top: 8px; line-height: 1.35; }
-
-    /* overlay when drawer open */
-    .overlay {
-      position: fixed;
-      inset: 0;
-      background: rgba(0,0,0,.25);
-      opacity: 0;
-      pointer-events: none;
-      transition: opacity .22s ease;
-      z-index: 40;
-    }
-    .overlay.show { opacity: 1; pointer-events: auto; }
-
-    /* Open The Calendar button (clearly visible, different style) */
-    #openCalendarBtn{
-      position: fixed;
-      right: 14px;
-      top: 40%;
-      transform: translateY(-50%);
-      z-index: 60;
-
-      background: #fff;
-      color: #111;
-      border: 1px solid #bbb;
-      border-radius: 14px;
-      padding: 12px 14px;
-
-      font-weight: 700;
-      letter-spacing: .2px;
-      box-shadow: 0 10px 22px rgba(0,0,0,.10);
-      cursor: pointer;
-    }
-
-    /* When drawer opens, slide this button left a bit */
-    #openCalendarBtn.shiftLeft{
-      transform: translate(calc(-340px), -50%);
-      transition: transform .22s ease;
-    }
-
-    /* Nudge animation when user presses Total gross / Miles / Tolls */
-    @keyframes nudgeLeft {
-      0% { transform: translateY(-50%) translateX(0); }
-      40% { transform: translateY(-50%) translateX(-16px); }
-      100% { transform: translateY(-50%) translateX(0); }
-    }
-    #openCalendarBtn.nudge{
-      animation: nudgeLeft .28s ease;
-    }
-
-    /* Mobile friendly */
-    @media (max-width: 560px) {
-      body { margin: 18px auto; padding: 0 12px; }
-      .card { padding: 14px; }
-      button { width: 100%; }
-      td, th { padding: 10px 6px; font-size: 14px; }
-
-      .brandLogo{ height:44px; }
-      .brandTitle{ font-size: 26px; }
-
-      /* Drawer becomes bottom sheet */
-      .drawer {
-        top: auto;
-        bottom: 0;
-        right: 0;
-        left: 0;
-        width: 100%;
-        height: 72vh;
-        border-left: none;
-        border-top: 1px solid #ddd;
-        box-shadow: 0 -12px 28px rgba(0,0,0,.10);
-        transform: translateY(110%);
-      }
-      .drawer.open { transform: translateY(0); }
-
-      /* Open Calendar becomes bottom bar on mobile */
-      #openCalendarBtn{
-        top: auto;
-        bottom: 14px;
-        left: 12px;
-        right: 12px;
-        width: calc(100% - 24px);
-        transform: none;
-        border-radius: 16px;
-        padding: 14px 16px;
-      }
-      #openCalendarBtn.shiftLeft{ transform: none; }
-
-      @keyframes nudgeLeftMobile {
-        0% { transform: translateY(0); }
-        40% { transform: translateY(-6px); }
-        100% { transform: translateY(0); }
-      }
-      #openCalendarBtn.nudge{
-        animation: nudgeLeftMobile .28s ease;
-      }
-    }
-  </style>
-</head>
-<body>
-
-  <div class="brand">
-    <img src="/logo.png" alt="TruckTotals logo" class="brandLogo" draggable="false">
-    <div class="brandText">
-      <h1 class="brandTitle">TruckTotals</h1>
-      <p class="muted brandTagline">This is a website made specifically for truck drivers that can save tons of time</p>
-    </div>
-  </div>
-
-  <div class="card">
-    <form method="post" enctype="multipart/form-data" id="mainForm">
-      <input type="hidden" name="upload_id" id="uploadId" value="{{ upload_id or '' }}">
-      <input type="hidden" name="removed" id="removedFlag" value="0">
-
-      <!-- Date filter hidden fields (submitted to server) -->
-      <input type="hidden" name="range_start" id="rangeStart" value="{{ range_start or '' }}">
-      <input type="hidden" name="range_end" id="rangeEnd" value="{{ range_end or '' }}">
-
-      <div class="toprow">
-        <label><b>Select PDFs:</b></label>
-        <button type="button" class="danger" id="removeBtn">Remove files</button>
-      </div>
-
-      <input id="pdfInput" type="file" name="pdfs" accept="application/pdf" multiple required>
-      <br><br>
-
-      <div class="btnrow">
-        <button type="submit" name="action" value="balance" class="actionBtn">Total gross</button>
-        <button type="submit" name="action" value="miles" class="actionBtn">Total Miles Driven</button>
-        <button type="submit" name="action" value="tolls" class="actionBtn">Tolls</button>
-        <button type="submit" name="action" value="expenses" class="actionBtn">Truck expenses</button>
-      </div>
-    </form>
-  </div>
-
-  {% if show_no_files %}
-    <div class="card">
-      <p class="bad"><b>No files selected.</b></p>
-    </div>
-  {% endif %}
-
-  {% if filter_message %}
-    <div class="card">
-      <p class="{{ 'good' if filter_ok else 'bad' }}"><b>{{ filter_message }}</b></p>
-    </div>
-  {% endif %}
-
-  {% if results is not none %}
-    <div class="card" id="resultsCard">
-      <h2>Results</h2>
-      <div class="tablewrap">
-        <table>
-          <tr>
-            <th>File</th>
-            <th>Date</th>
-            <th>
-              {% if mode == 'miles' %}
-                Miles driven
-              {% elif mode == 'tolls' %}
-                Tolls
-              {% elif mode == 'expenses' %}
-                Truck expenses
-              {% else %}
-                Balance due
-              {% endif %}
-            </th>
-          </tr>
-          {% for r in results %}
-            <tr>
-              <td>{{ r.name }}</td>
-              <td class="{{ 'good' if r.daterange is not none else 'bad' }}">
-                {% if r.daterange is not none %}{{ r.daterange }}{% else %}NOT FOUND{% endif %}
-              </td>
-              <td class="{{ 'good' if r.amount is not none else 'bad' }}">
-                {% if r.amount is not none %}
-                  {% if mode == 'miles' %}
-                    {{ "{:,}".format(r.amount|int) }}
-                  {% else %}
-                    ${{ "{:,.2f}".format(r.amount) }}
-                  {% endif %}
-                {% else %}
-                  NOT FOUND
-                {% endif %}
-              </td>
-            </tr>
-          {% endfor %}
-        </table>
-      </div>
-
-      {% if mode == 'miles' %}
-        <h3>Total miles: {{ "{:,}".format(total|int) }}</h3>
-        {% if missing > 0 %}
-          <p class="bad">Warning: miles (Empty + Loaded) were not found in {{ missing }} file(s).</p>
-        {% endif %}
-      {% elif mode == 'tolls' %}
-        <h3>Total tolls: ${{ "{:,.2f}".format(total) }}</h3>
-        {% if missing > 0 %}
-          <p class="bad">Warning: tolls subtotal was not found in {{ missing }} file(s).</p>
-        {% endif %}
-      {% elif mode == 'expenses' %}
-        <h3>Total truck expenses: ${{ "{:,.2f}".format(total) }}</h3>
-        {% if missing > 0 %}
-          <p class="bad">Warning: deductions subtotal was not found in {{ missing }} file(s).</p>
-        {% endif %}
-      {% else %}
-        <h3>Total gross: ${{ "{:,.2f}".format(total) }}</h3>
-        {% if missing > 0 %}
-          <p class="bad">Warning: “Balance due” was not found in {{ missing }} file(s).</p>
-        {% endif %}
-      {% endif %}
-    </div>
-  {% endif %}
-
-  <button type="button" id="openCalendarBtn" aria-controls="drawer" aria-expanded="false">Open The Calendar</button>
-
-  <!-- Overlay + Drawer -->
-  <div class="overlay" id="overlay"></div>
-
-  <div class="drawer" id="drawer">
-    <div class="drawerHeader">
-      <b>Date filter</b>
-      <button type="button" class="ghostBtn" id="closeDrawer">Close</button>
-    </div>
-
-    <div class="drawerBody">
-      <div class="pill">
-        <b>Pick the dates</b>
-        <div class="row" style="margin-top:10px;">
-          <select id="monthSel" class="select month">
-            <option>January</option><option>February</option><option>March</option><option>April</option>
-            <option>May</option><option>June</option><option>July</option><option>August</option>
-            <option>September</option><option>October</option><option>November</option><option>December</option>
-          </select>
-          <select id="daySel" class="select mini"></select>
-          <select id="yearSel" class="select mini"></select>
-        </div>
-
-        <div class="row" style="margin-top:10px;">
-          <button type="button" id="pickDateBtn">Select start date</button>
-          <button type="button" class="danger" id="removeDateBtn">Remove date</button>
-        </div>
-
-        <div class="hint">
-          Use the dropdowns to choose a date, then press <b>Select start date</b> / <b>Select end date</b>.
-        </div>
-      </div>
-
-      <div class="pill">
-        <div class="row" style="justify-content:space-between;">
-          <b>Or type a date</b>
-          <button type="button" class="ghostBtn" id="toggleTypeBtn">Type out the date</button>
-        </div>
-
-        <input id="typeInput" class="textin" placeholder="00/00/00" inputmode="text" autocomplete="off" style="margin-top:10px; display:none;">
-        <div class="hint" id="typeHint" style="display:none;">
-          Examples: <b>12/15/25</b>, <b>12/15/2025</b>, <b>December 15 2025</b>, <b>dec 15 25</b>
-        </div>
-      </div>
-
-      <div class="pill">
-        <b>Range from</b>
-        <div id="rangeBox" style="margin-top:10px; font-weight:600;">
-          {% if range_start and range_end %}
-            {{ range_start }} <span class="muted">to</span> {{ range_end }}
-          {% elif range_start %}
-            {{ range_start }} <span class="muted">to</span> <span class="muted">(choose end)</span>
-          {% else %}
-            <span class="muted">Choose start and end dates</span>
-          {% endif %}
-        </div>
-        <div class="hint" id="nextHint" style="margin-top:8px;">
-          Next: <b id="nextTargetLabel">start</b>
-        </div>
-      </div>
-    </div>
-
-    <div class="drawerFooter">
-      <form method="post" id="filterForm">
-        <input type="hidden" name="upload_id" value="{{ upload_id or '' }}">
-        <input type="hidden" name="action" value="filter_dates">
-        <input type="hidden" name="range_start" id="filterRangeStart" value="{{ range_start or '' }}">
-        <input type="hidden" name="range_end" id="filterRangeEnd" value="{{ range_end or '' }}">
-        <button type="submit" id="applyFilterBtn">Select files between those dates</button>
-      </form>
-      <div class="hint">
-        This will remove files outside the date range from your current selection.
-      </div>
-    </div>
-  </div>
-
-  <script>
-    (function () {
-      const uploadId = document.getElementById("uploadId").value;
-      const input = document.getElementById("pdfInput");
-      if (uploadId) input.required = false;
-    })();
-
-    document.getElementById("removeBtn").addEventListener("click", function () {
-      const input = document.getElementById("pdfInput");
-      const uploadId = document.getElementById("uploadId");
-      const removed = document.getElementById("removedFlag");
-      const resultsCard = document.getElementById("resultsCard");
-
-      input.value = "";
-      uploadId.value = "";
-      removed.value = "1";
-      input.required = true;
-
-      if (resultsCard) resultsCard.remove();
-      document.getElementById("mainForm").submit();
-    });
-
-    const drawer = document.getElementById("drawer");
-    const overlay = document.getElementById("overlay");
-    const closeDrawer = document.getElementById("closeDrawer");
-    const openCalendarBtn = document.getElementById("openCalendarBtn");
-
-    function openDrawer() {
-      drawer.classList.add("open");
-      overlay.classList.add("show");
-      openCalendarBtn.classList.add("shiftLeft");
-      openCalendarBtn.setAttribute("aria-expanded", "true");
-    }
-    function hideDrawer() {
-      drawer.classList.remove("open");
-      overlay.classList.remove("show");
-      openCalendarBtn.classList.remove("shiftLeft");
-      openCalendarBtn.setAttribute("aria-expanded", "false");
-    }
-
-    overlay.addEventListener("click", hideDrawer);
-    closeDrawer.addEventListener("click", hideDrawer);
-
-    openCalendarBtn.addEventListener("click", function () {
-      if (drawer.classList.contains("open")) hideDrawer();
-      else openDrawer();
-    });
-
-    document.querySelectorAll(".actionBtn").forEach(btn => {
-      btn.addEventListener("click", function () {
-        openCalendarBtn.classList.remove("nudge");
-        void openCalendarBtn.offsetWidth;
-        openCalendarBtn.classList.add("nudge");
-      });
-    });
-
-    const monthSel = document.getElementById("monthSel");
-    const daySel = document.getElementById("daySel");
-    const yearSel = document.getElementById("yearSel");
-
-    for (let d = 1; d <= 31; d++) {
-      const opt = document.createElement("option");
-      opt.value = String(d);
-      opt.textContent = String(d);
-      daySel.appendChild(opt);
-    }
-
-    for (let y = 2000; y <= 2035; y++) {
-      const opt = document.createElement("option");
-      opt.value = String(y);
-      opt.textContent = String(y);
-      yearSel.appendChild(opt);
-    }
-
-    yearSel.value = "2025";
-
-    const rangeBox = document.getElementById("rangeBox");
-    const nextTargetLabel = document.getElementById("nextTargetLabel");
-    const filterRangeStart = document.getElementById("filterRangeStart");
-    const filterRangeEnd = document.getElementById("filterRangeEnd");
-
-    let startVal = (filterRangeStart.value || "").trim();
-    let endVal = (filterRangeEnd.value || "").trim();
-
-    let nextTarget = startVal && !endVal ? "end" : "start";
-    nextTargetLabel.textContent = nextTarget;
-
-    function renderRange() {
-      if (startVal && endVal) {
-        rangeBox.innerHTML = `${startVal} <span class="muted">to</span> ${endVal}`;
-      } else if (startVal && !endVal) {
-        rangeBox.innerHTML = `${startVal} <span class="muted">to</span> <span class="muted">(choose end)</span>`;
-      } else {
-        rangeBox.innerHTML = `<span class="muted">Choose start and end dates</span>`;
-      }
-      nextTargetLabel.textContent = nextTarget;
-      filterRangeStart.value = startVal;
-      filterRangeEnd.value = endVal;
-    }
-
-    function pad2(n) { return n < 10 ? "0" + n : "" + n; }
+    # The bytes never change while the process lives: repeat visits revalidate with
+    # If-None-Match and get a 304 (send_file's conditional handling) or skip the request entirely
+    resp = send_file(
+        BytesIO(LOGO_PNG_BYTES), mimetype="image/png", etag=LOGO_ETAG, max_age=365 * 24 * 60 * 60
+    )
+    resp.cache_control.immutable = True
+    return resp
 
-    function monthToNumber(monthName) {
-      const map = {
-        january:1, february:2, march:3, april:4, may:5, june:6,
-        july:7, august:8, september:9, october:10, november:11, december:12
-      };
-      return map[(monthName||"").toLowerCase()] || 0;
-    }
 
-    function setNext(dateStr) {
-      if (nextTarget === "start") {
-        startVal = dateStr;
-        endVal = "";
-        nextTarget = "end";
-      } else {
-        endVal = dateStr;
-        nextTarget = "start";
-      }
-      renderRange();
-    }
+def format_cents(cents: int) -> str:
+    sign = "-" if cents < 0 else ""
+    dollars, rest = divmod(abs(cents), 100)
+    return f"{sign}{dollars:,}.{rest:02d}"
 
-    function blockEnter(e) {
-      if (e.key === "Enter") {
-        e.preventDefault();
-      }
-    }
-    monthSel.addEventListener("keydown", blockEnter);
-    daySel.addEventListener("keydown", blockEnter);
-    yearSel.addEventListener("keydown", blockEnter);
-
-    const pickDateBtn = document.getElementById("pickDateBtn");
-    const removeDateBtn = document.getElementById("removeDateBtn");
-
-    function getSelectDateStr() {
-      const monthNum = monthToNumber(monthSel.value);
-      const dayNum = parseInt(daySel.value || "1", 10);
-      const yearNum = parseInt(yearSel.value || "2025", 10);
-      const yy = String(yearNum).slice(-2);
-      return `${pad2(monthNum)}/${pad2(dayNum)}/${yy}`;
-    }
-
-    function updatePickButtonLabel() {
-      pickDateBtn.textContent = (nextTarget === "start") ? "Select start date" : "Select end date";
-    }
-
-    pickDateBtn.addEventListener("click", function () {
-      setNext(getSelectDateStr());
-      updatePickButtonLabel();
-    });
-
-    removeDateBtn.addEventListener("click", function () {
-      if (endVal) {
-        endVal = "";
-        nextTarget = "end";
-      } else if (startVal) {
-        startVal = "";
-        nextTarget = "start";
-      }
-      renderRange();
-      updatePickButtonLabel();
-    });
-
-    const toggleTypeBtn = document.getElementById("toggleTypeBtn");
-    const typeInput = document.getElementById("typeInput");
-    const typeHint = document.getElementById("typeHint");
-
-    let typingMode = false;
-
-    toggleTypeBtn.addEventListener("click", () => {
-      typingMode = !typingMode;
-      if (typingMode) {
-        typeInput.style.display = "block";
-        typeHint.style.display = "block";
-        typeInput.value = "";
-        typeInput.placeholder = "/  / ";
-        typeInput.focus();
-      } else {
-        typeInput.style.display = "none";
-        typeHint.style.display = "none";
-      }
-    });
-
-    typeInput.addEventListener("keydown", (e) => {
-      if (e.key === "Enter") {
-        e.preventDefault();
-      }
-    });
-
-    renderRange();
-    updatePickButtonLabel();
-  </script>
-</body>
-</html>
-"""
+# Money is kept as integer cents (exact totals); templates/index.html formats it with |cents
+app.jinja_env.filters["cents"] = format_cents
 
 # -----------------------------
 # Helpers
 # -----------------------------
-def extract_text_from_bytes(pdf_bytes: bytes) -> str:
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+def extract_text_pdfium(pdf_bytes: bytes) -> str:
+    pdf = pdfium.PdfDocument(pdf_bytes)
     text_parts = []
-    for page in doc:
-        text_parts.append(page.get_text("text"))
-    doc.close()
-    return " ".join(" ".join(text_parts).split())
-
-def signed_money_to_float(s: str) -> float:
-    s = (s or "").strip().replace(" ", "")
-    if s.startswith("(") and s.endswith(")"):
-        s = "-" + s[1:-1]
-    s = s.replace("$", "").replace(",", "")
-    return float(s)
-
-def extract_pickups_from_bytes(pdf_bytes: bytes):
-    text = extract_text_from_bytes(pdf_bytes)
-    return [m.group("pickup") for m in LOAD_ROW_PICKUP_DELIVERY_REGEX.finditer(text)]
-
-def extract_pickup_date_range_from_bytes(pdf_bytes: bytes):
-    pickups = extract_pickups_from_bytes(pdf_bytes)
-    if not pickups:
+    for page in pdf:
+        textpage = page.get_textpage()
+        text_parts.append(textpage.get_text_range())
+        textpage.close()
+        page.close()
+    pdf.close()
+    return "\n".join(text_parts)
+
+def full_text(doc) -> str:
+    # No whitespace normalization: the regexes match gaps with \s
+    return "\n".join(page.get_text("text", flags=TEXT_FLAGS, sort=False) for page in doc)
+
+def extract_text_from_bytes(pdf_bytes: bytes) -> str:
+    if PDF_BACKEND == "pdfium" and pdfium is not None:
+        return extract_text_pdfium(pdf_bytes)
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return full_text(doc)
+
+def signed_money_to_cents(s: str):
+    s = "".join((s or "").split())
+    negative = s.startswith("(") and s.endswith(")")
+    s = s.strip("()").replace("$", "").replace(",", "").rstrip(".")
+    if s.startswith("-"):
+        negative = True
+        s = s.lstrip("-")
+    try:
+        cents = round(float(s) * 100)
+    except ValueError:
         return None
-    return f"{pickups[0]} to {pickups[-1]}"
+    return -cents if negative else cents
 
-def extract_first_pickup_date_obj(pdf_bytes: bytes):
-    pickups = extract_pickups_from_bytes(pdf_bytes)
-    if not pickups:
+def parse_pickup_date(s):
+    """
+    Parse a load-row "MM/DD/YY" by slicing; the regex guarantees the shape, so strptime's
+    format interpreter is skipped. Two-digit years pivot like %y: 69-99 -> 19xx, else 20xx.
+    """
+    if not s:
         return None
+    year = int(s[6:8])
     try:
-        return datetime.strptime(pickups[0], "%m/%d/%y").date()
+        return date(year + (1900 if year >= 69 else 2000), int(s[0:2]), int(s[3:5]))
     except ValueError:
         return None
 
-def extract_balance_due_from_bytes(pdf_bytes: bytes):
-    text = extract_text_from_bytes(pdf_bytes)
-    m = BALANCE_DUE_REGEX.search(text)
-    if not m:
-        return None
+def subtotal_after(regex, text: str, pos: int):
+    """
+    First subtotal after pos whose amount parses; one that doesn't is skipped like a non-match.
+    """
+    for m in regex.finditer(text, pos):
+        cents = signed_money_to_cents(m.group(1))
+        if cents is not None:
+            return cents
+    return None
 
-    amt = m.group("amount")
-    sign = m.group("sign")
-    paren_open = m.group("paren_open")
-    paren_close = m.group("paren_close")
+def extract_fields_from_text(text: str) -> dict:
+    fields = {
+        "balance": None, "miles": None, "tolls": None, "expenses": None,
+        "daterange": None, "first_pickup": None,
+    }
+    seen = set()
+    first_pickup = last_pickup = None
+
+    for m in COMBINED_REGEX.finditer(text):
+        kind = m.lastgroup
+        if kind == "loadrow":
+            last_pickup = m.group("pickup")
+            if first_pickup is None:
+                first_pickup = last_pickup
+            continue
+
+        # Like .search(), only the first hit of every other field counts
+        if kind in seen:
+            continue
+
+        if kind == "balance":
+            # An amount that doesn't parse isn't a hit; keep looking at later "Balance due" lines
+            fields["balance"] = signed_money_to_cents(m.group("amount"))
+            if fields["balance"] is None:
+                continue
+        elif kind == "miles":
+            fields["miles"] = int(m.group("empty")) + int(m.group("loaded"))
+        elif kind == "tolls":
+            fields["tolls"] = subtotal_after(TOLLS_SUBTOTAL_REGEX, text, m.end("tolls"))
+        else:
+            fields["expenses"] = subtotal_after(DEDUCTIONS_SUBTOTAL_REGEX, text, m.end("expenses"))
+        # Tolls/Deductions count as seen even without a subtotal: subtotal_after already tried
+        # every one after the first heading, which covers whatever a later heading could reach
+        seen.add(kind)
 
-    s = amt
-    if sign:
-        s = "-" + s
-    if paren_open and paren_close:
-        s = "-" + s
+    if first_pickup is not None:
+        fields["daterange"] = f"{first_pickup} to {last_pickup}"
+        fields["first_pickup"] = first_pickup
+    return fields
 
-    return signed_money_to_float(s)
+def _extract_all(pdf_bytes: bytes) -> dict:
+    """
+    Process-pool worker: open the PDF once and pull every field out of the same text.
+    A file that isn't a readable PDF gets every field None (NOT FOUND rows) instead of an
+    exception, which would cut the streamed results page off after its head has gone out.
+    """
+    try:
+        text = extract_text_from_bytes(pdf_bytes)
+    except Exception:
+        text = ""
+    return extract_fields_from_text(text)
 
-def extract_total_miles_from_bytes(pdf_bytes: bytes):
-    text = extract_text_from_bytes(pdf_bytes)
-    m = SUBTOTAL_EMPTY_LOADED_REGEX.search(text)
-    if not m:
-        return None
-    return int(m.group(1)) + int(m.group(2))
+# Buttons that total a field; each name is also its key in the extracted fields
+METRICS = frozenset({"balance", "miles", "tolls", "expenses"})
 
-def extract_tolls_subtotal_from_bytes(pdf_bytes: bytes):
-    text = extract_text_from_bytes(pdf_bytes)
-    m = TOLLS_SUBTOTAL_REGEX.search(text)
-    if not m:
-        return None
-    return signed_money_to_float(m.group(1))
+@dataclass(slots=True)
+class ResultTally:
+    """
+    Total and missing count for the results table, filled in while its rows are streamed out.
+    """
+    total: int = 0  # cents, or miles
+    missing: int = 0
 
-# NEW
-def extract_deductions_subtotal_from_bytes(pdf_bytes: bytes):
-    text = extract_text_from_bytes(pdf_bytes)
-    m = DEDUCTIONS_SUBTOTAL_REGEX.search(text)
-    if not m:
-        return None
-    return signed_money_to_float(m.group(1))
+@dataclass(slots=True)
+class Row:
+    """
+    One line of the results table; the template reads r.name / r.daterange / r.amount.
+    """
+    name: str
+    daterange: str | None
+    amount: int | None  # cents, or miles
+
+def iter_fields(stored: list):
+    """
+    Yield (item, fields) for every stored file, in upload order, as soon as its fields are ready.
+    Only files without cached fields go to the process pool; all of them are submitted up front.
+    """
+    futures = {
+        id(item): submit_extraction(item["bytes"])
+        for item in stored
+        if item["fields"] is None
+    }
+    for item in stored:
+        if item["fields"] is None:
+            try:
+                fields = futures[id(item)].result()
+            except BrokenProcessPool:
+                # A worker died under this file (or a neighbour): retry once on a fresh pool,
+                # and if that dies too, show the file as NOT FOUND rather than cut off the page
+                try:
+                    fields = submit_extraction(item["bytes"]).result()
+                except BrokenProcessPool:
+                    fields = extract_fields_from_text("")
+            item["fields"] = fields
+            item["bytes"] = None
+            FIELDS_CACHE.put(item["digest"], item["fields"])
+        yield item, item["fields"]
+
+def iter_results(stored: list, mode: str, tally: ResultTally):
+    """
+    Yield one results row per stored file, adding it to the tally on the way out.
+    """
+    for item, fields in iter_fields(stored):
+        amt = fields[mode]
+        if amt is None:
+            tally.missing += 1
+        else:
+            tally.total += amt
+        yield Row(item["name"], fields["daterange"], amt)
 
 MONTH_MAP = {
     "jan": 1, "january": 1,
@@ -789,6 +487,10 @@ MONTH_MAP = {
     "dec": 12, "december": 12,
 }
 
+# Splits "Jan 2, 2025" in one pass: commas count as whitespace
+_WS_SPLIT = re.compile(r"[\s,]+")
+
+@lru_cache(maxsize=256)
 def parse_user_date(s: str):
     if not s:
         return None
@@ -819,7 +521,7 @@ def parse_user_date(s: str):
             except ValueError:
                 return None
 
-    parts = re.split(r"\s+", raw.replace(",", " ").strip())
+    parts = [p for p in _WS_SPLIT.split(raw) if p]
     if len(parts) >= 3:
         mtxt = parts[0].lower()
         month = MONTH_MAP.get(mtxt[:3], 0)
@@ -837,20 +539,26 @@ def parse_user_date(s: str):
 # -----------------------------
 # Route
 # -----------------------------
+def page_context(**ctx) -> dict:
+    """
+    Variables for templates/index.html: an empty page, with whatever the caller passes on top.
+    """
+    page = {
+        "results": None,
+        "upload_id": "",
+        "show_no_files": False,
+        "range_start": "",
+        "range_end": "",
+        "filter_message": "",
+        "filter_ok": True,
+    }
+    page.update(ctx)
+    return page
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "GET":
-        build_logo_png_bytes()  # <-- FORCE logo generation on first load
-        return render_template_string(
-            HTML,
-            results=None,
-            upload_id="",
-            show_no_files=False,
-            range_start="",
-            range_end="",
-            filter_message="",
-            filter_ok=True,
-        )
+        return render_template("index.html", **page_context())
 
     action = request.form.get("action", "balance").strip()
     upload_id = (request.form.get("upload_id") or "").strip()
@@ -866,7 +574,18 @@ def index():
         if f and getattr(f, "filename", ""):
             name = f.filename.strip()
             if name:
-                selected_files.append({"name": name, "bytes": f.read()})
+                data = f.read()
+                digest = FieldsCache.digest(data)
+                fields = FIELDS_CACHE.get(digest)
+                # A statement seen before comes with its fields and never keeps its bytes
+                selected_files.append({
+                    "name": name,
+                    "bytes": data if fields is None else None,
+                    "digest": digest,
+                    "fields": fields,
+                })
+            # Release Werkzeug's spooled copy now instead of at request teardown
+            f.close()
 
     if selected_files:
         if not upload_id:
@@ -874,32 +593,17 @@ def index():
         UPLOAD_STORE[upload_id] = selected_files
 
     if removed_flag:
-        if upload_id and upload_id in UPLOAD_STORE:
-            del UPLOAD_STORE[upload_id]
+        if upload_id:
+            UPLOAD_STORE.pop(upload_id)
         upload_id = ""
-        return render_template_string(
-            HTML,
-            results=None,
-            upload_id="",
-            show_no_files=True,
-            range_start="",
-            range_end="",
-            filter_message="",
-            filter_ok=True,
-        )
+        return render_template("index.html", **page_context(show_no_files=True))
 
     stored = UPLOAD_STORE.get(upload_id, []) if upload_id else []
 
     if not stored and not selected_files and action != "filter_dates":
-        return render_template_string(
-            HTML,
-            results=None,
-            upload_id=upload_id,
-            show_no_files=False,
-            range_start=range_start_raw,
-            range_end=range_end_raw,
-            filter_message="",
-            filter_ok=True,
+        return render_template(
+            "index.html",
+            **page_context(upload_id=upload_id, range_start=range_start_raw, range_end=range_end_raw),
         )
 
     filter_message = ""
@@ -923,8 +627,9 @@ def index():
 
                 kept = []
                 removed = 0
-                for item in stored:
-                    d0 = extract_first_pickup_date_obj(item["bytes"])
+                # Fields extracted here stay cached, so the totals that follow don't reparse
+                for item, fields in iter_fields(stored):
+                    d0 = parse_pickup_date(fields["first_pickup"])
                     if d0 is None:
                         kept.append(item)
                         continue
@@ -938,74 +643,23 @@ def index():
                 filter_message = f"Filtered files. Removed {removed} file(s) outside the range."
                 filter_ok = True
 
-    if action == "filter_dates":
-        return render_template_string(
-            HTML,
-            results=None,
-            upload_id=upload_id,
-            show_no_files=False,
-            range_start=range_start_raw,
-            range_end=range_end_raw,
-            filter_message=filter_message,
-            filter_ok=filter_ok,
-        )
-
-    results = []
-    total = 0.0
-    missing = 0
-
-    for item in stored:
-        name = item["name"]
-        data = item["bytes"]
-        daterange = extract_pickup_date_range_from_bytes(data)
-
-        if action == "miles":
-            amt = extract_total_miles_from_bytes(data)
-            results.append({"name": name, "daterange": daterange, "amount": amt})
-            if amt is None:
-                missing += 1
-            else:
-                total += float(amt)
-        elif action == "tolls":
-            amt = extract_tolls_subtotal_from_bytes(data)
-            results.append({"name": name, "daterange": daterange, "amount": amt})
-            if amt is None:
-                missing += 1
-            else:
-                total += amt
-        elif action == "expenses":
-            amt = extract_deductions_subtotal_from_bytes(data)
-            results.append({"name": name, "daterange": daterange, "amount": amt})
-            if amt is None:
-                missing += 1
-            else:
-                total += amt
-        else:
-            amt = extract_balance_due_from_bytes(data)
-            results.append({"name": name, "daterange": daterange, "amount": amt})
-            if amt is None:
-                missing += 1
-            else:
-                total += amt
-
-    mode = (
-        "expenses" if action == "expenses"
-        else ("tolls" if action == "tolls" else ("miles" if action == "miles" else "balance"))
-    )
-
-    return render_template_string(
-        HTML,
-        results=results,
-        total=total,
-        missing=missing,
-        mode=mode,
+    ctx = page_context(
         upload_id=upload_id,
-        show_no_files=False,
         range_start=range_start_raw,
         range_end=range_end_raw,
         filter_message=filter_message,
         filter_ok=filter_ok,
     )
+    if action == "filter_dates":
+        return render_template("index.html", **ctx)
+
+    mode = action if action in METRICS else "balance"
+
+    # Stream the page: rows go out as each PDF is parsed, the totals after the last row
+    tally = ResultTally()
+    ctx.update(results=iter_results(stored, mode, tally), tally=tally, mode=mode)
+    page = stream_template("index.html", **ctx)
+    return Response(page, mimetype="text/html")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=10000)
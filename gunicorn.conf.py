@@ -0,0 +1,12 @@
+# Loaded explicitly by the Render startCommand: `gunicorn -c gunicorn.conf.py app:app`
+import os
+
+# One worker process: uploads live in that process's memory (UPLOAD_STORE), so a second
+# worker would not find them. PDF parsing already runs in app.EXTRACT_POOL (EXTRACT_WORKERS processes);
+# threads let several users wait on that pool at the same time.
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+# Large multi-PDF uploads can take a while to parse
+timeout = 120